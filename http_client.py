@@ -0,0 +1,44 @@
+"""
+Shared HTTP session for Thread-Auto.
+
+Every outbound HTTP call in the pipeline (article scraping, image
+extraction, Threads Graph API) goes through the one session exported
+here, so DNS results, pooled keep-alive sockets and TLS session
+tickets are amortized across the whole run instead of paid per call.
+"""
+
+import atexit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Default request headers to mimic browser
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+# Request timeout in seconds
+REQUEST_TIMEOUT = 10
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # Skip per-request proxy/env probing (getproxies walks the
+    # environment and, on macOS, the system config on every call)
+    session.trust_env = False
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+SESSION = _build_session()
+
+# Close pooled sockets cleanly when the process exits
+atexit.register(SESSION.close)
@@ -20,13 +20,17 @@ Usage:
     AI_PROVIDER=gemini GEMINI_API_KEY=AIza... python main.py
 """
 
+import asyncio
+import datetime
 import os
+import re
 from typing import Optional
 
 from rss_collector import (
     fetch_feed,
     get_latest_entry,
     get_entry_info,
+    fetch_article_content,
     DEFAULT_RSS_SOURCES
 )
 from image_extractor import get_all_images
@@ -48,6 +52,16 @@ AI_MODEL = os.environ.get("AI_MODEL", None)  # None = 제공자 기본 모델 
 THREADS_ACCESS_TOKEN = os.environ.get("THREADS_ACCESS_TOKEN")
 RSS_URL = os.environ.get("RSS_URL", DEFAULT_RSS_SOURCES["techcrunch"])
 DRY_RUN = os.environ.get("DRY_RUN", "True").lower() in ("true", "1", "yes")
+# Append each day's articles to one compressed archive/YYYY-MM-DD.md.zst
+# instead of one small .md per article (needs the zstandard package)
+ARCHIVE_COMPRESS = os.environ.get("ARCHIVE_COMPRESS", "False").lower() in ("true", "1", "yes")
+
+# Precompiled once for save_archive's title sanitization
+_TITLE_BRACKET_RE = re.compile(r'\[(.*?)\]')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]')
+_BOLD_RE = re.compile(r'\*\*')
+_SAFE_CHARS_RE = re.compile(r'[^a-zA-Z0-9\s\-가-힣]')
+_WS_RE = re.compile(r'\s+')
 
 
 def get_api_key() -> Optional[str]:
@@ -55,7 +69,7 @@ def get_api_key() -> Optional[str]:
     config = PROVIDERS.get(AI_PROVIDER)
     if not config:
         return None
-    return os.environ.get(config["env_key"])
+    return os.environ.get(config.env_key)
 
 
 
@@ -65,42 +79,36 @@ def save_archive(content: dict, image_urls: list[str], source_url: str, title: s
     Directory format: archive/YYYY-MM-DD/
     File name format: Sanitize_Title.md
     """
-    import datetime
-    import re
-    
     date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-    # Create directory for the day
     daily_archive_dir = os.path.join("archive", date_str)
-    os.makedirs(daily_archive_dir, exist_ok=True)
-    
+
     # Sanitize title for filename
     # Try to extract the Korean title from the AI content first
     raw_title = title  # Default to RSS title
     if content and content.get("main_post"):
         main_text = content["main_post"].strip()
         # Regex to find **[Title]** or [Title] pattern
-        match = re.search(r'\[(.*?)\]', main_text)
+        match = _TITLE_BRACKET_RE.search(main_text)
         if match:
             raw_title = match.group(1).strip()
         else:
             # Fallback: take first sentence or max 30 chars
             first_line = main_text.split("\n")[0]
             # Split by sentence delimiters
-            sentence_match = re.split(r'[.!?]', first_line)
+            sentence_match = _SENTENCE_SPLIT_RE.split(first_line)
             if sentence_match:
                 raw_title = sentence_match[0].strip()
             else:
                 raw_title = first_line.strip()
-            
+
             # Remove MD formatting like bold
-            raw_title = re.sub(r'\*\*', '', raw_title)
-            
+            raw_title = _BOLD_RE.sub('', raw_title)
+
     # Keep Korean, alphanumeric, spaces, hyphens.
-    # Korean Unicode range: \uAC00-\uD7A3
     # User requested NO underscores. We will use spaces.
-    safe_title = re.sub(r'[^a-zA-Z0-9\s\-\uAC00-\uD7A3]', '', raw_title)
+    safe_title = _SAFE_CHARS_RE.sub('', raw_title)
     # Collapse multiple spaces to single space
-    safe_title = re.sub(r'\s+', ' ', safe_title).strip()
+    safe_title = _WS_RE.sub(' ', safe_title).strip()
     
     # Limit length
     if len(safe_title) > 30: # Stricter limit for fallback cases
@@ -111,43 +119,116 @@ def save_archive(content: dict, image_urls: list[str], source_url: str, title: s
         
     file_path = os.path.join(daily_archive_dir, f"{safe_title}.md")
     
+    # Assemble the document in memory and write it in one call instead
+    # of a dozen small f.write syscalls.
+    parts = [f"# {raw_title}\n\n"]
+
+    # Main Post & Images
+    parts.append("## Main Post\n")
+
+    # If Single type, list ALL images (Carousel simulation)
+    if content.get("type") == "single":
+        for i, img_url in enumerate(image_urls):
+            parts.append(f"![Image {i+1}]({img_url})\n")
+        parts.append("\n")
+    # If Multi type, only first image here (others go to replies)
+    elif len(image_urls) > 0:
+        parts.append(f"![Main Image]({image_urls[0]})\n\n")
+
+    parts.append(f"{content.get('main_post', '')}\n\n")
+
+    # Replies & Distributed Images
+    if content.get("type") == "multi":
+        parts.append("## Replies\n")
+        for i, reply in enumerate(content.get("replies", [])):
+            parts.append(f"### Reply {i+1}\n")
+
+            # Check for Image i+1
+            if len(image_urls) > i + 1:
+                parts.append(f"![Reply Image {i+1}]({image_urls[i+1]})\n\n")
+
+            parts.append(f"{reply}\n\n")
+
+    # Source
+    parts.append("## Source\n")
+    parts.append(f"Original Article: {source_url}\n")
+
+    document = "".join(parts)
+
+    if ARCHIVE_COMPRESS and _append_compressed_archive(document, date_str):
+        return
+
+    # Create directory for the day
+    os.makedirs(daily_archive_dir, exist_ok=True)
     with open(file_path, "w", encoding="utf-8") as f:
-        # Title (Use the Korean extracted title)
-        f.write(f"# {raw_title}\n\n")
-        
-        # Main Post & Images
-        f.write("## Main Post\n")
-        
-        # If Single type, list ALL images (Carousel simulation)
-        if content.get("type") == "single":
-            for i, img_url in enumerate(image_urls):
-                f.write(f"![Image {i+1}]({img_url})\n")
-            f.write("\n")
-        # If Multi type, only first image here (others go to replies)
-        elif len(image_urls) > 0:
-            f.write(f"![Main Image]({image_urls[0]})\n\n")
-            
-        f.write(f"{content.get('main_post', '')}\n\n")
-        
-        # Replies & Distributed Images
-        if content.get("type") == "multi":
-            f.write("## Replies\n")
-            for i, reply in enumerate(content.get("replies", [])):
-                f.write(f"### Reply {i+1}\n")
-                
-                # Check for Image i+1
-                if len(image_urls) > i + 1:
-                    f.write(f"![Reply Image {i+1}]({image_urls[i+1]})\n\n")
-                    
-                f.write(f"{reply}\n\n")
-                
-        # Source
-        f.write("## Source\n")
-        f.write(f"Original Article: {source_url}\n")
-        
+        f.write(document)
+
     print(f"✅ 아카이브 저장 완료: {file_path}")
 
 
+def _append_compressed_archive(document: str, date_str: str) -> bool:
+    """
+    Append one article to the day's zstd archive.
+
+    Each article is written as an independent zstd frame, so appending
+    never rewrites earlier articles. One file per day avoids the
+    small-file/inode overhead of an .md per article and compresses
+    markdown roughly 4-6x.
+
+    Returns:
+        True if the compressed write succeeded.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        print("⚠️ zstandard 미설치, 일반 아카이브로 저장합니다.")
+        return False
+
+    archive_path = os.path.join("archive", f"{date_str}.md.zst")
+    try:
+        os.makedirs("archive", exist_ok=True)
+        with open(archive_path, "ab") as raw:
+            compressor = zstandard.ZstdCompressor()
+            with compressor.stream_writer(raw, closefd=False) as writer:
+                writer.write(document.encode("utf-8"))
+        print(f"✅ 압축 아카이브 저장 완료: {archive_path}")
+        return True
+    except OSError as e:
+        print(f"⚠️ 압축 아카이브 저장 실패: {e}")
+        return False
+
+
+def read_compressed_archive(date_str: str) -> str:
+    """
+    Read back a day's compressed archive as one markdown string.
+
+    Example:
+        >>> print(read_compressed_archive("2026-08-26"))
+    """
+    import zstandard
+
+    archive_path = os.path.join("archive", f"{date_str}.md.zst")
+    decompressor = zstandard.ZstdDecompressor()
+    with open(archive_path, "rb") as f:
+        with decompressor.stream_reader(f, read_across_frames=True) as reader:
+            return reader.read().decode("utf-8")
+
+
+async def _fetch_page_assets(url: str) -> tuple:
+    """
+    Fetch article images and body text concurrently.
+
+    The two scrapes hit the same page independently, so overlapping
+    them halves the network wait of Steps 2/2.5. The extractors stay
+    synchronous (requests-based); worker threads release the GIL on
+    network I/O, the same pattern ai_analyzer uses for sync clients.
+    """
+    return await asyncio.gather(
+        asyncio.to_thread(get_all_images, url),
+        asyncio.to_thread(fetch_article_content, url),
+    )
+
+
 def run_pipeline() -> None:
     """
     Execute the Thread-Auto pipeline.
@@ -164,19 +245,18 @@ def run_pipeline() -> None:
     print(f"# AI Provider: {AI_PROVIDER.upper()}")
     print("#" * 50)
 
-    # Validate API key
+    # Resolve provider config and API key once up front
+    provider_config = PROVIDERS.get(AI_PROVIDER)
     api_key = get_api_key()
     if not api_key:
-        config = PROVIDERS.get(AI_PROVIDER, {})
-        env_key = config.get("env_key", "API_KEY")
+        env_key = provider_config.env_key if provider_config else "API_KEY"
         print(f"❌ {env_key} 환경 변수가 설정되지 않았습니다.")
         print(f"\n{get_provider_info()}")
         return
 
-    provider_config = PROVIDERS.get(AI_PROVIDER)
-    model = AI_MODEL or provider_config["default_model"]
+    model = AI_MODEL or provider_config.default_model
     print(f"# Model: {model}")
-    print(f"# Free Limit: {provider_config['free_limit']}")
+    print(f"# Free Limit: {provider_config.free_limit}")
     print("#" * 50)
 
     # Step 1: Fetch RSS feed
@@ -196,22 +276,17 @@ def run_pipeline() -> None:
     info = get_entry_info(entry)
     print(f"✅ 최신 글 발견: {info['title']}")
 
-    # Step 2: Extract Images
-    print(f"\n🔄 [Step 2] 이미지 추출 중...")
-    image_urls = get_all_images(info["link"])
-    
+    # Step 2 + 2.5: Extract Images & Fetch Full Article Content (동시 실행)
+    print(f"\n🔄 [Step 2/2.5] 이미지 추출 + 기사 본문 스크래핑 중...")
+    image_urls, full_content = asyncio.run(_fetch_page_assets(info["link"]))
+
     if image_urls:
         print(f"✅ 이미지 {len(image_urls)}장 발견")
         print(f"   대표 이미지: {image_urls[0][:60]}...")
     else:
         print("⚠️ 이미지 없음 (텍스트만 게시)")
         image_urls = []
-        
-    # Step 2.5: Fetch Full Article Content
-    print(f"\n🔄 [Step 2.5] 기사 본문 스크래핑 중...")
-    from rss_collector import fetch_article_content
-    full_content = fetch_article_content(info["link"])
-    
+
     if full_content:
         print(f"✅ 본문 추출 성공 ({len(full_content)}자)")
     else:
@@ -0,0 +1,111 @@
+
+import time
+
+import pytest
+
+import ai_analyzer
+from ai_analyzer import LLMCache, SYSTEM_PROMPT, _MainPostScanner, validate_content
+
+
+# Fixtures for test data
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(path=str(tmp_path / "cache.db"))
+
+@pytest.fixture
+def thread_content():
+    return {
+        "type": "single",
+        "main_post": "메인 포스트 본문입니다.",
+        "replies": []
+    }
+
+def test_system_prompt_token_budget():
+    """
+    Test that the compressed persona prompt stays inside its budget.
+    The pre-compression prompt was ~1600 chars, so the character guard
+    catches regressions even where tiktoken's encoding can't load.
+    """
+    assert len(SYSTEM_PROMPT) < 1000
+
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        pytest.skip("tiktoken encoding unavailable")
+    assert len(encoding.encode(SYSTEM_PROMPT)) < 1000
+
+def test_llm_cache_make_key_is_stable():
+    """Test that cache keys are deterministic and prompt-sensitive."""
+    key = LLMCache.make_key("model-a", "system", "user")
+    assert key == LLMCache.make_key("model-a", "system", "user")
+    assert key != LLMCache.make_key("model-a", "system", "other user")
+    assert key != LLMCache.make_key("model-b", "system", "user")
+
+def test_llm_cache_roundtrip(cache, thread_content):
+    """Test a miss, then a set/get roundtrip."""
+    key = LLMCache.make_key("m", "sys", "user")
+    assert cache.get(key) is None
+    cache.set(key, thread_content)
+    assert cache.get(key) == thread_content
+    assert cache.stats == "hits=1, misses=1"
+
+def test_llm_cache_survives_restart(tmp_path, thread_content):
+    """Test that the sqlite layer serves a fresh instance."""
+    path = str(tmp_path / "cache.db")
+    key = LLMCache.make_key("m", "sys", "user")
+    LLMCache(path=path).set(key, thread_content)
+
+    reopened = LLMCache(path=path)
+    assert reopened.get(key) == thread_content
+
+def test_llm_cache_expired_entry_misses(tmp_path, thread_content, monkeypatch):
+    """Test that entries older than the TTL are not served."""
+    path = str(tmp_path / "cache.db")
+    key = LLMCache.make_key("m", "sys", "user")
+    LLMCache(path=path).set(key, thread_content)
+
+    # Fresh instance so the in-memory layer can't answer the lookup
+    reopened = LLMCache(path=path)
+    now = time.time()
+    monkeypatch.setattr(ai_analyzer.time, "time",
+                        lambda: now + LLMCache.TTL_SECONDS + 1)
+    assert reopened.get(key) is None
+
+def test_main_post_scanner_streams_value_incrementally():
+    """Test that main_post text surfaces as chunks arrive, with escapes."""
+    scanner = _MainPostScanner()
+    parts = [
+        '{"type": "single", ',
+        '"main_post": "드디어 ',
+        '\\"Operator\\"가',
+        ' 왔군요.", "replies": []}',
+    ]
+    visible = [scanner.feed(p) for p in parts]
+    assert "".join(visible) == '드디어 "Operator"가 왔군요.'
+    # Nothing is visible before the value opens
+    assert visible[0] == ""
+
+def test_main_post_scanner_stops_after_value():
+    """Test that text after the closing quote is never surfaced."""
+    scanner = _MainPostScanner()
+    assert scanner.feed('{"main_post": "본문"') == "본문"
+    assert scanner.feed(', "replies": ["무시됨"]}') == ""
+
+def test_validate_content_accepts_valid_shapes(thread_content):
+    """Test validation of well-formed single and multi content."""
+    assert validate_content(thread_content)
+    assert validate_content({
+        "type": "multi",
+        "main_post": "메인",
+        "replies": ["답글 1", "답글 2"]
+    })
+
+def test_validate_content_rejects_invalid_shapes():
+    """Test validation failures for empty or malformed content."""
+    assert not validate_content({})
+    assert not validate_content({"type": "thread", "main_post": "x"})
+    assert not validate_content({"type": "single"})
+    assert not validate_content({"type": "multi", "main_post": "x"})
+    assert not validate_content({"type": "multi", "main_post": "x",
+                                 "replies": "답글이 리스트가 아님"})
@@ -1,7 +1,10 @@
-import requests
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
+from http_client import SESSION
+
 
 def format_output(
     data: Dict[str, Any],
@@ -32,50 +35,62 @@ def print_dry_run(
     separator = "=" * 50
     sub_separator = "-" * 30
 
-    print(f"\n{separator}")
-    print(f"📢 [DRY RUN] 게시물 타입: {data.get('type', 'unknown').upper()}")
-    print(separator)
+    # Hoisted once; these keys are re-read throughout the function
+    post_type = data.get("type", "single")
+    main_post = data.get("main_post", "")
+    replies = data.get("replies", [])
+
+    # Buffer the whole report and write it once: a single stdout
+    # syscall instead of ~20 individually locked and flushed prints.
+    lines = [
+        f"\n{separator}",
+        f"📢 [DRY RUN] 게시물 타입: {post_type.upper()}",
+        separator,
+        "\n[1] 메인 포스트",
+    ]
 
-    # Main post
-    print(f"\n[1] 메인 포스트")
-    
     # Single Post + Multiple Images = Carousel Logic
-    if data.get("type", "single") == "single" and len(image_urls) > 1:
-        print(f"    🎠 [Carousel Mode] 총 {len(image_urls)}장의 이미지 포함")
+    if post_type == "single" and len(image_urls) > 1:
+        lines.append(f"    🎠 [Carousel Mode] 총 {len(image_urls)}장의 이미지 포함")
         for i, url in enumerate(image_urls):
-             print(f"    - 이미지[{i}]: {url[:60]}...")
+            lines.append(f"    - 이미지[{i}]: {url[:60]}...")
     elif len(image_urls) > 0:
-        print(f"    🖼️ 이미지[0]: {image_urls[0][:60]}...")
+        lines.append(f"    🖼️ 이미지[0]: {image_urls[0][:60]}...")
     else:
-        print("    🖼️ 이미지: 없음")
-    print(sub_separator)
-    print(data.get("main_post", ""))
+        lines.append("    🖼️ 이미지: 없음")
+    lines.append(sub_separator)
+    lines.append(main_post)
 
     # Replies (for multi-thread)
-    if data.get("type") == "multi":
-        replies = data.get("replies", [])
+    if post_type == "multi":
         for i, reply in enumerate(replies):
-            print(f"\n[{i + 2}] 대댓글")
-            
+            lines.append(f"\n[{i + 2}] 대댓글")
+
             # Check for Image i+1
             if len(image_urls) > i + 1:
-                print(f"    🖼️ 이미지[{i+1}]: {image_urls[i+1][:60]}...")
-            
-            print(sub_separator)
-            print(reply)
+                lines.append(f"    🖼️ 이미지[{i+1}]: {image_urls[i+1][:60]}...")
+
+            lines.append(sub_separator)
+            lines.append(reply)
 
     # Source citation (always last)
-    reply_num = len(data.get("replies", [])) + 2 if data.get("type") == "multi" else 2
-    print(f"\n[{reply_num}] 출처 페이지")
-    print(sub_separator)
-    print(f"출처 : {source_url}")
+    reply_num = len(replies) + 2 if post_type == "multi" else 2
+    lines.append(f"\n[{reply_num}] 출처 페이지")
+    lines.append(sub_separator)
+    lines.append(f"출처 : {source_url}")
+
+    lines.append(f"\n{separator}")
+    lines.append("✅ Dry Run 완료. 실제 Threads에는 업로드되지 않았습니다.")
+    lines.append(separator + "\n")
 
-    print(f"\n{separator}")
-    print("✅ Dry Run 완료. 실제 Threads에는 업로드되지 않았습니다.")
-    print(separator + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 THREADS_API_BASE = "https://graph.threads.net/v1.0"
 
+# user_id is stable per access_token, so the /me lookup only needs to
+# happen once per token instead of once per post run.
+_USER_ID_CACHE: dict[str, str] = {}
+
 
 def _create_container(
     user_id: str,
@@ -117,7 +132,7 @@ def _create_container(
             params["reply_to_id"] = reply_to_id
         
     try:
-        response = requests.post(url, params=params)
+        response = SESSION.post(url, params=params)
         response.raise_for_status()
         container_id = response.json().get("id")
         return container_id
@@ -125,31 +140,47 @@ def _create_container(
         print(f"❌ 컨테이너 생성 실패: {e} | Response: {response.text}")
         return None
 
+# Publish polling schedule: try immediately, then back off. Containers
+# are usually ready at once, so the old fixed 2-second sleep per publish
+# was almost always pure idle time.
+_PUBLISH_DELAYS = (0.0, 0.3, 0.6, 1.2, 2.0)
+
+
 def _publish_container(
     user_id: str,
     access_token: str,
     creation_id: str
 ) -> Optional[str]:
     """
-    Publish a created container.
+    Publish a created container, polling until the media is ready.
+
+    The API answers 4xx while a container is still processing, so each
+    4xx waits the next delay in _PUBLISH_DELAYS and retries instead of
+    every publish paying a fixed up-front sleep.
     """
     url = f"{THREADS_API_BASE}/{user_id}/threads_publish"
     params = {
         "access_token": access_token,
         "creation_id": creation_id
     }
-    
-    try:
-        # Rate limit safety wait
-        time.sleep(2)
-        
-        response = requests.post(url, params=params)
-        response.raise_for_status()
-        post_id = response.json().get("id")
-        return post_id
-    except Exception as e:
-        print(f"❌ 게시물 발행 실패: {e} | Response: {response.text}")
-        return None
+
+    response = None
+    for attempt, delay in enumerate(_PUBLISH_DELAYS):
+        if delay:
+            time.sleep(delay)
+        try:
+            response = SESSION.post(url, params=params)
+            response.raise_for_status()
+            post_id = response.json().get("id")
+            return post_id
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            not_ready = status is not None and 400 <= status < 500
+            if not_ready and attempt < len(_PUBLISH_DELAYS) - 1:
+                continue
+            body = getattr(response, "text", "")
+            print(f"❌ 게시물 발행 실패: {e} | Response: {body}")
+            return None
 
 def post_to_threads(
     data: Dict[str, Any],
@@ -164,28 +195,59 @@ def post_to_threads(
     print("🚀 Threads API로 업로드 시작...")
     
     # 1. Get User ID (me)
-    try:
-        me_res = requests.get(f"{THREADS_API_BASE}/me", params={"access_token": access_token})
-        me_res.raise_for_status()
-        user_id = me_res.json().get("id")
-    except Exception as e:
-        print(f"❌ 사용자 정보 조회 실패: {e}")
-        return False
+    user_id = _USER_ID_CACHE.get(access_token)
+    if user_id is None:
+        try:
+            me_res = SESSION.get(f"{THREADS_API_BASE}/me", params={"access_token": access_token})
+            me_res.raise_for_status()
+            user_id = me_res.json().get("id")
+        except Exception as e:
+            print(f"❌ 사용자 정보 조회 실패: {e}")
+            return False
+        if user_id:
+            _USER_ID_CACHE[access_token] = user_id
+
+    # 1.5 Validate image URLs up front. The reply chain is causally
+    # ordered and cannot be retried piecemeal, so a dead image link
+    # should fail the run here rather than after containers exist.
+    if image_urls:
+        def _reachable(img_url: str) -> bool:
+            try:
+                return SESSION.head(img_url, timeout=5).ok
+            except Exception:
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(8, len(image_urls))) as ex:
+            checks = list(ex.map(_reachable, image_urls))
+        bad_urls = [u for u, ok in zip(image_urls, checks) if not ok]
+        if bad_urls:
+            print(f"❌ 접근 불가 이미지 URL로 업로드 중단: {bad_urls}")
+            return False
 
     # 2. Main Post
+    post_type = data.get("type", "single")
     main_text = data.get("main_post", "")
-    
+    replies = data.get("replies", [])
+
     container_id = None
-    
+
     # Check if Single Post AND Multiple Images -> Use Carousel
-    if data.get("type", "single") == "single" and len(image_urls) > 1:
+    if post_type == "single" and len(image_urls) > 1:
         print(f"   🎠 단일 포스트 + 다중 이미지({len(image_urls)}장) -> 캐러셀 생성")
         
         # 2-1. Create Item Containers
+        # Item containers are independent of each other (only the parent
+        # carousel references them), so create them concurrently: one
+        # round-trip of wall time instead of one per image.
+        def _create_item(img_url: str) -> Optional[str]:
+            return _create_container(user_id, access_token,
+                                     is_carousel_item=True, image_url=img_url)
+
+        with ThreadPoolExecutor(max_workers=min(8, len(image_urls))) as ex:
+            results = list(ex.map(_create_item, image_urls))
+
         item_ids = []
-        for img_url in image_urls:
-            # Create Carousel Item
-            item_id = _create_container(user_id, access_token, is_carousel_item=True, image_url=img_url)
+        for img_url, item_id in zip(image_urls, results):
             if item_id:
                 item_ids.append(item_id)
             else:
@@ -213,8 +275,7 @@ def post_to_threads(
     # 3. Replies (if multi type)
     last_post_id = main_post_id
     
-    if data.get("type") == "multi":
-        replies = data.get("replies", [])
+    if post_type == "multi":
         for i, reply_text in enumerate(replies):
             # Assign Image i+1 to Reply i
             reply_image = image_urls[i+1] if len(image_urls) > i+1 else None
@@ -250,6 +311,9 @@ def post_to_threads(
     return True
 
 
+_TYPE_LABELS = {"single": "SINGLE", "multi": "MULTI", "unknown": "UNKNOWN"}
+
+
 def generate_summary(data: Dict[str, Any]) -> str:
     """
     Generate a brief summary of the content for logging.
@@ -266,11 +330,12 @@ def generate_summary(data: Dict[str, Any]) -> str:
     """
     content_type = data.get("type", "unknown")
     main_post = data.get("main_post", "")
-    preview = main_post[:50] + "..." if len(main_post) > 50 else main_post
-    reply_count = len(data.get("replies", []))
 
+    # Known type labels are precomputed; the single f-string skips the
+    # intermediate preview concatenation on the common short-post path.
+    label = _TYPE_LABELS.get(content_type) or content_type.upper()
     return (
-        f"Type: {content_type.upper()}, "
-        f"Replies: {reply_count}, "
-        f"Preview: {preview}"
+        f"Type: {label}, "
+        f"Replies: {len(data.get('replies', []))}, "
+        f"Preview: {main_post[:50]}{'...' if len(main_post) > 50 else ''}"
     )